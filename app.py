@@ -1,16 +1,26 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Header
+from fastapi import FastAPI, HTTPException, Depends, status, Header, Query
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, InsertOne
+from pymongo.errors import BulkWriteError, OperationFailure
 from pymongo.server_api import ServerApi
 from datetime import datetime, timedelta
+from functools import lru_cache
+import asyncio
+import hashlib
 import os
+import secrets
+import time
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from bson import ObjectId
 import jwt
+import orjson
 import logging
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import AfterValidator, BaseModel, StringConstraints
+from typing import Annotated, List, Optional, Union
 
 
 # Configure logging
@@ -20,6 +30,12 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+def json_default(obj):
+    """orjson fallback for BSON types it can't encode natively (used where we call orjson.dumps directly)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 # Create FastAPI app
 app = FastAPI()
 
@@ -27,16 +43,67 @@ app = FastAPI()
 MONGO_URI = os.getenv('MONGO_URI' )
 DB_NAME = "OMG"
 
-try:
-    client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
-    client.admin.command('ping')
-    logger.info("✅ MongoDB connection successful")
-    db = client[DB_NAME]
-    logger.info(f"✅ Using database: {DB_NAME}")
-    logger.info(f"📂 Collections: {db.list_collection_names()}")
-except Exception as e:
-    logger.error(f"❌ MongoDB connection failed: {e}")
-    raise
+# ISO 8601 (UTC) format for datetimes rendered server-side with $dateToString
+MONGO_ISO_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%LZ"
+
+# Pool limits apply per worker process, so split one connection budget across the
+# workers (kept under the 500-connection limit of small Atlas tiers by default)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+MONGO_CONNECTION_BUDGET = int(os.getenv('MONGO_CONNECTION_BUDGET', 400))
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', max(10, MONGO_CONNECTION_BUDGET // WEB_CONCURRENCY)))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    server_api=ServerApi('1'),
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=60000
+)
+db = client[DB_NAME]
+
+@lru_cache(maxsize=1 << 16)
+def parse_object_id(value: str) -> ObjectId:
+    """ObjectId(value), memoized for ids that are looked up repeatedly"""
+    return ObjectId(value)
+
+async def ensure_indexes():
+    """Create the indexes backing the world record and tournament queries"""
+    await db.games.create_index("id")
+    # Covers the /api/world-records projection so it never reads the documents
+    await db.world_records.create_index([("gameId", 1), ("score", 1)], name="cover_gid_score")
+    await db.world_records.create_index("gameId", unique=True)
+    # Serves per-tournament lookups and the score-descending leaderboard sort
+    await db.tournament_scores.create_index([("tournamentId", 1), ("score", -1)])
+    await db.tournament_scores.create_index([("tournamentId", 1), ("userId", 1)], unique=True)
+
+@app.on_event("startup")
+async def startup():
+    try:
+        await client.admin.command('ping')
+        logger.info("✅ MongoDB connection successful")
+        logger.info(f"✅ Using database: {DB_NAME}")
+        logger.info(f"📂 Collections: {await db.list_collection_names()}")
+    except Exception as e:
+        logger.error(f"❌ MongoDB connection failed: {e}")
+        raise
+
+    try:
+        await ensure_indexes()
+        logger.info("✅ Indexes ensured")
+    except OperationFailure as e:
+        # The unique indexes are what keep the score upserts correct; don't serve without them
+        if e.code == 11000:
+            logger.error(
+                "❌ Duplicate scores block the unique indexes; "
+                "run `python dedupe_scores.py --dry-run`, then `python dedupe_scores.py`"
+            )
+        logger.error(f"❌ Index creation failed: {e}")
+        raise
+
+@app.on_event("shutdown")
+async def shutdown():
+    client.close()
 
 # JWT Configuration (keeping this in case you want some endpoints to remain private)
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
@@ -46,6 +113,36 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 24 * 60
 # OAuth2 Scheme (keeping this in case you want some endpoints to remain private)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Response cache for read-mostly endpoints (serialized JSON bytes keyed by endpoint)
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 30))
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
+response_cache = TTLCache(maxsize=8, ttl=CACHE_TTL_SECONDS)
+# /api/games pages are keyed by client-chosen params; keep them apart so they can't evict the above
+games_page_cache = TTLCache(maxsize=32, ttl=CACHE_TTL_SECONDS)
+# key → [lock, number of requests holding or waiting on it]
+cache_locks = {}
+
+async def cached_response(key: str, fetch, cache: TTLCache = response_cache):
+    """Serve the cached JSON body for `key` from `cache`, calling `fetch` to rebuild it on a miss"""
+    body = cache.get(key)
+    if body is None:
+        entry = cache_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            # Only one request per key rebuilds the entry; the rest wait and reuse it
+            async with entry[0]:
+                body = cache.get(key)
+                if body is None:
+                    body = orjson.dumps(await fetch(), default=json_default)
+                    cache[key] = body
+        finally:
+            # Keys include client-supplied paging params, so drop the lock once
+            # nobody holds or waits on it
+            entry[1] -= 1
+            if entry[1] == 0 and cache_locks.get(key) is entry:
+                del cache_locks[key]
+    return Response(content=body, media_type="application/json")
+
 def create_access_token(user_id: str):
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {
@@ -54,17 +151,28 @@ def create_access_token(user_id: str):
     }
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
+# Verified tokens → (user, exp), so repeat calls skip HS256 and the user lookup
+token_cache = TTLCache(maxsize=10_000, ttl=300)
+
 # Keeping the auth function but not using it for public endpoints
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = token_cache.get(cache_key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = await db.users.find_one({"_id": parse_object_id(user_id)})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
+
+        if payload.get("exp"):
+            token_cache[cache_key] = (user, payload["exp"])
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -75,11 +183,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 @app.post("/api/generate_guest")
 async def generate_guest():
     """Public endpoint to generate a guest user"""
-    user_id = db.users.insert_one({
+    result = await db.users.insert_one({
         "is_guest": True,
         "created_at": datetime.utcnow(),
         "balance": 0.0
-    }).inserted_id
+    })
+    user_id = result.inserted_id
     
     token = create_access_token(str(user_id))
     return {
@@ -94,27 +203,33 @@ async def user_details(user_id: Optional[str] = None):
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id parameter is required")
     
-    try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        return {
-            "status": True,
-            "userId": str(user["_id"]),
-            "balance": user.get("balance", 0.0),
-            "is_guest": user.get("is_guest", False)
-        }
-    except Exception as e:
+    if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user_id")
 
+    user = await db.users.find_one(
+        {"_id": parse_object_id(user_id)},
+        {"balance": 1, "is_guest": 1}
+    )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {
+        "status": True,
+        "userId": str(user["_id"]),
+        "balance": user.get("balance", 0.0),
+        "is_guest": user.get("is_guest", False)
+    }
+
 @app.get("/api/get_game_details")
 async def get_game_details():
     """Public endpoint to get all game details"""
-    try:
-        categories = list(db.category.find({}, {"_id": 0}))
-        bundles = list(db.bundles.find({}, {"_id": 0}))
-        games = list(db.games.find({}, {"_id": 0}))
+    async def fetch():
+        # Run the three queries concurrently over the connection pool
+        categories, bundles, games = await asyncio.gather(
+            db.category.find({}, {"_id": 0}).to_list(length=None),
+            db.bundles.find({}, {"_id": 0}).to_list(length=None),
+            db.games.find({}, {"_id": 0}).to_list(length=None)
+        )
         
         return {
             "status": True,
@@ -122,6 +237,9 @@ async def get_game_details():
             "bundles": bundles,
             "games": games
         }
+
+    try:
+        return await cached_response("game_details", fetch)
     except Exception as e:
         logger.error(f"Error fetching game data: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch game data")
@@ -129,18 +247,23 @@ async def get_game_details():
 @app.get("/api/get_categories")
 async def get_categories():
     """Public endpoint to get all categories"""
-    try:
-        categories = list(db.category.find({}))
+    async def fetch():
+        # createdAt arrives already formatted, so there is nothing left to do per category
+        categories = await db.category.aggregate([
+            {"$project": {
+                "_id": 0,
+                "id": 1,
+                "name": 1,
+                "createdAt": {"$dateToString": {"date": "$createdAt", "format": MONGO_ISO_DATE_FORMAT}}
+            }}
+        ]).to_list(length=None)
         return {
             "status": True,
-            "data": [
-                {
-                    "id": cat["id"],
-                    "name": cat["name"],
-                    "createdAt": cat.get("createdAt", "").isoformat()
-                } for cat in categories
-            ]
+            "data": categories
         }
+
+    try:
+        return await cached_response("categories", fetch)
     except Exception as e:
         logger.error(f"Error fetching categories: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch categories")
@@ -156,19 +279,25 @@ class GameResponse(BaseModel):
     image_url: str
     LastUpdate: Optional[str] = None
 
-@router.get("/games", response_model=List[GameResponse])
-async def get_all_games():
+class GamePageResponse(BaseModel):
+    items: List[GameResponse]
+    next: Optional[int] = None
+
+# GamePageResponse only documents the schema; games are not re-validated per request
+@router.get("/games", response_model=None, responses={200: {"model": GamePageResponse}})
+async def get_all_games(
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[int] = None
+):
     """
-    Public endpoint to fetch all games with their details:
-    - id: Game ID
-    - name: Game name
-    - bundle_url: Download URL
-    - category_names: List of categories
-    - image_url: Game image URL
+    Public endpoint to fetch games page by page, ordered by id:
+    - items: Games with id, name, bundle_url, category_names and image_url
+    - next: Pass as `after` to get the next page (null on the last page)
     """
-    try:
-        # Fetch all games from MongoDB
-        games = list(db.games.find({}, {
+    async def fetch():
+        # Fetch one page of games from MongoDB
+        query = {"id": {"$gt": after}} if after is not None else {}
+        games = await db.games.find(query, {
             "_id": 0,       # Exclude MongoDB's _id
             "id": 1,        # Include game ID
             "name": 1,      # Include game name
@@ -176,10 +305,15 @@ async def get_all_games():
             "category_names": 1,  # Include categories
             "image_url": 1,
             "LastUpdate": 1 
-        }))
-        
-        return games
-        
+        }).sort("id", 1).limit(limit).to_list(length=limit)
+
+        return {
+            "items": games,
+            "next": games[-1]["id"] if len(games) == limit else None
+        }
+
+    try:
+        return await cached_response(f"games:{limit}:{after}", fetch, games_page_cache)
     except Exception as e:
         logging.error(f"Failed to fetch games: {str(e)}")
         raise HTTPException(
@@ -190,22 +324,38 @@ async def get_all_games():
 
 #test
 
+def validate_object_id(value: str) -> str:
+    if not ObjectId.is_valid(value):
+        raise ValueError("Invalid ObjectId")
+    return value
+
+# Hex ObjectId kept as a string, matching how ids are stored on score documents
+ObjectIdStr = Annotated[str, AfterValidator(validate_object_id)]
+
 # addinga new user
 class CreateUserRequest(BaseModel):
+    username: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+class WorldRecordSubmit(BaseModel):
+    userId: ObjectIdStr
+    gameId: Union[int, str]
+    score: int
+
+class TournamentScoreSubmit(BaseModel):
+    tournamentId: ObjectIdStr
+    userId: ObjectIdStr
     username: str
+    score: int
 
 @app.post("/api/user/create")
-def create_user(data: CreateUserRequest):
-    if not data.username.strip():
-        raise HTTPException(400, "Username required")
-
+async def create_user(data: CreateUserRequest):
     user = {
-        "username": data.username.strip(),
+        "username": data.username,
         "createdAt": datetime.utcnow(),
         "isGuest": True
     }
 
-    result = db.users.insert_one(user)
+    result = await db.users.insert_one(user)
 
     return {
         "status": True,
@@ -215,196 +365,213 @@ def create_user(data: CreateUserRequest):
 
 
 @app.post("/api/world-record/submit")
-def submit_world_record(payload: dict):
+async def submit_world_record(payload: WorldRecordSubmit):
+
+    user_id = payload.userId
+    game_id = payload.gameId
+    score = payload.score
+
+    # True when the new score beats the stored one (or there is no stored score yet)
+    beats_record = {"$lt": [{"$ifNull": ["$score", None]}, score]}
+
+    # Single atomic upsert on the unique gameId: the pipeline keeps the current
+    # record unless the new score beats it, so a losing score changes nothing.
+    # With an equality-only filter, Mongo itself retries a racing first insert.
+    result = await db.world_records.update_one(
+        {"gameId": game_id},
+        [{"$set": {
+            "userId": {"$cond": [beats_record, {"$literal": user_id}, "$userId"]},
+            "score": {"$cond": [beats_record, score, "$score"]},
+            "updatedAt": {"$cond": [beats_record, datetime.utcnow(), "$updatedAt"]}
+        }}],
+        upsert=True
+    )
 
-    try:
-        user_id = payload["userId"]
-        game_id = payload["gameId"]
-        score = int(payload["score"])
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid input")
-
-    record = db.world_records.find_one({"gameId": game_id})
-
-    # If no record → create
-    if not record:
-        db.world_records.insert_one({
-            "gameId": game_id,
-            "userId": user_id,
-            "score": score,
-            "updatedAt": datetime.utcnow()
-        })
-        return {"status": True, "newWorldRecord": True}
-
-    # If higher score → update
-    if score > record["score"]:
-        db.world_records.update_one(
-            {"gameId": game_id},
-            {
-                "$set": {
-                    "userId": user_id,
-                    "score": score,
-                    "updatedAt": datetime.utcnow()
-                }
-            }
-        )
-        return {"status": True, "newWorldRecord": True}
+    new_record = result.modified_count > 0 or result.upserted_id is not None
+    if new_record:
+        response_cache.pop("world_records", None)
 
-    return {"status": True, "newWorldRecord": False}
+    return {"status": True, "newWorldRecord": new_record}
 
-# tournament
+@app.get("/api/world-records")
+async def get_all_world_records():
+    projection = {"_id": 0, "gameId": 1, "score": 1}
+
+    async def fetch():
+        try:
+            # Hinted so the unfiltered scan walks the covering index, not the collection
+            records = await db.world_records.find({}, projection).hint("cover_gid_score").to_list(length=None)
+        except OperationFailure as e:
+            # Covering index missing (e.g. dropped after startup) → plain scan still works
+            logger.warning(f"world_records covering index unavailable: {e}")
+            records = await db.world_records.find({}, projection).to_list(length=None)
 
-@app.post("/api/world-record/submit")
-def submit_world_record(payload: dict):
+        return {
+            "status": True,
+            "data": records
+        }
 
     try:
-        user_id = payload["userId"]
-        game_id = payload["gameId"]
-        score = int(payload["score"])
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid input")
-
-    record = db.world_records.find_one({"gameId": game_id})
-
-    # If no record exists → create new
-    if not record:
-        db.world_records.insert_one({
-            "gameId": game_id,
-            "userId": user_id,
-            "score": score,
-            "updatedAt": datetime.utcnow()
-        })
-
-        return {"status": True, "newWorldRecord": True}
-
-    # If score is higher → update
-    if score > record["score"]:
-        db.world_records.update_one(
-            {"gameId": game_id},
-            {
-                "$set": {
-                    "userId": user_id,
-                    "score": score,
-                    "updatedAt": datetime.utcnow()
-                }
-            }
-        )
-
-        return {"status": True, "newWorldRecord": True}
-
-    # Otherwise → no update
-    return {"status": True, "newWorldRecord": False}
+        return await cached_response("world_records", fetch)
+    except Exception as e:
+        logger.error(f"Error fetching world records: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch world records")
 
-@app.get("/api/world-records")
-def get_all_world_records():
-    records = list(
-        db.world_records.find({}, {
-            "_id": 0,
-            "gameId": 1,
-            "score": 1
-        })
-    )
+@app.post("/api/admin/cache/invalidate", include_in_schema=False)
+async def invalidate_cache(x_admin_key: Optional[str] = Header(None)):
+    """
+    Admin endpoint to drop cached responses after a manual data change.
+    Caches live per worker process: this only clears the worker that handles
+    the request; other workers serve their copy until CACHE_TTL_SECONDS expires.
+    """
+    if not ADMIN_API_KEY or not secrets.compare_digest((x_admin_key or "").encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
 
+    response_cache.clear()
+    games_page_cache.clear()
     return {
         "status": True,
-        "data": records
+        "scope": "worker",
+        "message": f"Cleared this worker's cache only; other workers refresh within {CACHE_TTL_SECONDS}s"
     }
 
+# tournament
+
+# Documents per write when streaming large responses
+STREAM_CHUNK_SIZE = 100
+
 @app.get("/api/tournament/leaderboard")
-def get_leaderboard():
+async def get_leaderboard():
+
+    # Rank each tournament's scores on the server (ties share a rank)
+    cursor = db.tournament_scores.aggregate([
+        {"$setWindowFields": {
+            "partitionBy": "$tournamentId",
+            "sortBy": {"score": -1},
+            "output": {"rank": {"$rank": {}}}
+        }},
+        {"$project": {"_id": 0}}
+    ])
+
+    # Run the aggregation before the 200 goes out, so server errors still surface as a 500
+    try:
+        first = await anext(cursor, None)
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch leaderboard")
 
-    scores = list(
-        db.tournament_scores.find({}, {"_id": 0})
-    )
+    # Stream the JSON as the cursor yields instead of building the whole list first
+    async def stream():
+        yield b'{"status":true,"LeaderBoardData":['
+        if first is None:
+            yield b"]}"
+            return
+
+        chunk = [orjson.dumps(first, default=json_default)]
+        async for score in cursor:
+            chunk.append(b"," + orjson.dumps(score, default=json_default))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield b"".join(chunk)
+                chunk = []
+        yield b"".join(chunk) + b"]}"
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+TOURNAMENT_LEADERBOARD_SIZE = 50
 
-    return {
-        "status": True,
-        "LeaderBoardData": scores
-    }
 @app.post("/api/tournament/submit-score")
-def submit_tournament_score(payload: dict):
+async def submit_tournament_score(payload: TournamentScoreSubmit):
 
-    tournament_id = payload["tournamentId"]
-    user_id = payload["userId"]
-    username = payload["username"]
-    score = int(payload["score"])
+    tournament_id = payload.tournamentId
+    user_id = payload.userId
+    username = payload.username
+    score = payload.score
 
     # Check if user already in leaderboard
-    existing = db.tournament_scores.find_one({
+    existing = await db.tournament_scores.find_one({
         "tournamentId": tournament_id,
         "userId": user_id
-    })
+    }, {"score": 1})
 
     # If user already exists → update if higher
     if existing:
         if score > existing["score"]:
-            db.tournament_scores.update_one(
+            await db.tournament_scores.update_one(
                 {"_id": existing["_id"]},
                 {"$set": {"score": score}}
             )
         return {"status": True}
 
-    # Count how many currently stored
-    count = db.tournament_scores.count_documents({
-        "tournamentId": tournament_id
-    })
-
-    # If less than 50 → just insert
-    if count < 50:
-        db.tournament_scores.insert_one({
-            "tournamentId": tournament_id,
-            "userId": user_id,
-            "username": username,
-            "score": score,
-            "createdAt": datetime.utcnow()
-        })
-        return {"status": True}
+    # Fetch only the entries from 49th place down (index-backed, normally just
+    # the 49th and 50th); anything past 50th is left over from an oversized board
+    tail = await db.tournament_scores.find(
+        {"tournamentId": tournament_id},
+        {"score": 1}
+    ).sort("score", -1).skip(TOURNAMENT_LEADERBOARD_SIZE - 2).to_list(length=None)
 
-    # Already 50 → find lowest score
-    lowest = db.tournament_scores.find(
-        {"tournamentId": tournament_id}
-    ).sort("score", 1).limit(1)
+    board_full = len(tail) >= 2
 
-    lowest = list(lowest)[0]
+    # Already 50 → new score must beat the lowest
+    if board_full and score <= tail[1]["score"]:
+        return {
+            "status": False,
+            "message": "Score not high enough for Top 50"
+        }
 
-    # If new score is better than lowest
-    if score > lowest["score"]:
+    operations = [InsertOne({
+        "tournamentId": tournament_id,
+        "userId": user_id,
+        "username": username,
+        "score": score,
+        "createdAt": datetime.utcnow()
+    })]
+
+    # Board full → the new score pushes the old 50th place (and any overflow) out,
+    # in the same batch, so exactly 50 entries remain even when scores tie
+    if board_full:
+        operations.append(DeleteMany({
+            "_id": {"$in": [entry["_id"] for entry in tail[1:]]}
+        }))
 
-        # Delete lowest
-        db.tournament_scores.delete_one({"_id": lowest["_id"]})
+    try:
+        # Ordered: a failed insert never runs the trim
+        await db.tournament_scores.bulk_write(operations, ordered=True)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        if not write_errors or write_errors[0].get("code") != 11000:
+            raise
+
+        # A concurrent submit from the same user inserted first → update if higher
+        await db.tournament_scores.update_one(
+            {"tournamentId": tournament_id, "userId": user_id, "score": {"$lt": score}},
+            {"$set": {"score": score}}
+        )
+        return {"status": True}
 
-        # Insert new
-        db.tournament_scores.insert_one({
-            "tournamentId": tournament_id,
-            "userId": user_id,
-            "username": username,
-            "score": score,
-            "createdAt": datetime.utcnow()
-        })
+    if not board_full:
+        return {"status": True}
 
-        return {"status": True, "enteredLeaderboard": True}
+    return {"status": True, "enteredLeaderboard": True}
 
-    # Not good enough
-    return {
-        "status": False,
-        "message": "Score not high enough for Top 50"
-    }
+def default_if_missing(field: str, default):
+    """$project expression for dict.get(field, default): an explicit null stays null"""
+    return {"$cond": [{"$eq": [{"$type": field}, "missing"]}, {"$literal": default}, field]}
 
 @router.get("/api/tournaments")
-def get_tournaments():
-    tournaments = list(db.tournament.find({}))
-
-    formatted = []
-
-    for t in tournaments:
-        formatted.append({
-            "tournamentId": str(t.get("_id")),
-            "name": t.get("name", ""),
-            "gameName": t.get("gameName", ""),
-            "prizes": t.get("prizes", []),
-            "endDate": t.get("endDate").isoformat() if t.get("endDate") else None,
-            "activeTourni": t.get("activeTourni", False)
-        })
+async def get_tournaments():
+    # Shape every tournament on the server in one pass instead of a Python loop
+    formatted = await db.tournament.aggregate([
+        {"$project": {
+            "_id": 0,
+            "tournamentId": {"$toString": "$_id"},
+            "name": default_if_missing("$name", ""),
+            "gameName": default_if_missing("$gameName", ""),
+            "prizes": default_if_missing("$prizes", []),
+            # Left as a datetime so the response encoder renders it with isoformat() as before
+            "endDate": {"$ifNull": ["$endDate", None]},
+            "activeTourni": default_if_missing("$activeTourni", False)
+        }}
+    ]).to_list(length=None)
 
     return {
         "status": True,
@@ -416,5 +583,16 @@ app.include_router(router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Each worker is its own process with its own Mongo pool and caches; export the
+    # worker count so each one sizes its share of MONGO_CONNECTION_BUDGET
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() * 2 + 1))
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        loop="uvloop",
+        http="httptools"
+    )
 
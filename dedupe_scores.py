@@ -0,0 +1,60 @@
+"""
+One-off cleanup for duplicate score documents left by the old read-then-insert code.
+
+The API refuses to start until these unique indexes can be built:
+- world_records: gameId
+- tournament_scores: (tournamentId, userId)
+
+For each duplicate group this keeps the highest score and deletes the rest.
+Run `python dedupe_scores.py --dry-run` first to see what would be removed.
+"""
+from pymongo import MongoClient
+from pymongo.server_api import ServerApi
+from dotenv import load_dotenv
+import logging
+import os
+import sys
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+MONGO_URI = os.getenv('MONGO_URI')
+DB_NAME = "OMG"
+
+# collection → fields that must be unique together
+UNIQUE_KEYS = {
+    "world_records": ["gameId"],
+    "tournament_scores": ["tournamentId", "userId"],
+}
+
+def find_duplicates(collection, fields):
+    """Return a cursor over duplicate groups, each with its _ids ordered best score first"""
+    return collection.aggregate([
+        {"$sort": {"score": -1}},
+        {"$group": {
+            "_id": {field: f"${field}" for field in fields},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+def dedupe(db, dry_run: bool):
+    for name, fields in UNIQUE_KEYS.items():
+        removed = 0
+        for group in find_duplicates(db[name], fields):
+            extra_ids = group["ids"][1:]
+            logger.info(f"{name} {group['_id']}: keeping {group['ids'][0]}, removing {len(extra_ids)}")
+            if not dry_run:
+                db[name].delete_many({"_id": {"$in": extra_ids}})
+            removed += len(extra_ids)
+
+        action = "Would remove" if dry_run else "Removed"
+        logger.info(f"✅ {name}: {action} {removed} duplicate documents")
+
+if __name__ == "__main__":
+    client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
+    dedupe(client[DB_NAME], dry_run="--dry-run" in sys.argv[1:])
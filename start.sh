@@ -1,2 +1,4 @@
 #!/bin/bash
-uvicorn app:app --host 0.0.0.0 --port 10000
\ No newline at end of file
+# Exported so each worker can size its share of the Mongo connection budget
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(( $(nproc) * 2 + 1 ))}"
+uvicorn app:app --host 0.0.0.0 --port 10000 --workers "$WEB_CONCURRENCY" --loop uvloop --http httptools